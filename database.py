@@ -3,13 +3,19 @@ Database Helper Functions
 
 MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
+
+The client is an async Motor client. Call `connect()` on application startup and
+`close()` on shutdown (see the lifespan handler in main.py); the helpers below
+are coroutines and must be awaited.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne
+from bson import ObjectId
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -21,16 +27,44 @@ db = None
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
-if database_url and database_name:
-    _client = MongoClient(database_url)
-    db = _client[database_name]
+# Connection pool sizing; sized per worker process
+client_options = {
+    "maxPoolSize": int(os.getenv("DATABASE_MAX_POOL_SIZE", 50)),
+    "minPoolSize": int(os.getenv("DATABASE_MIN_POOL_SIZE", 10)),
+    "maxIdleTimeMS": 30000,
+    "serverSelectionTimeoutMS": 3000,
+    "retryWrites": True,
+}
 
-# Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
+
+def connect():
+    """Create the Motor client and bind `db` (no-op if not configured)"""
+    global _client, db
+    if database_url and database_name and _client is None:
+        _client = AsyncIOMotorClient(database_url, **client_options)
+        db = _client[database_name]
+    return db
+
+
+async def ensure_indexes():
+    """Create indexes backing the hot query paths (idempotent)"""
     if db is None:
-        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+        return
+    await db["pricingtier"].create_index([("min_quantity", -1)])
+    await db["jerseyorder"].create_index([("customer_email", 1)])
+
+
+def close():
+    """Close the Motor client"""
+    global _client, db
+    if _client is not None:
+        _client.close()
+    _client = None
+    db = None
 
+
+# Helper functions for common database operations
+def _prepare(data: Union[BaseModel, dict]) -> dict:
     # Convert Pydantic model to dict if needed
     if isinstance(data, BaseModel):
         data_dict = data.model_dump()
@@ -39,17 +73,33 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
 
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
+    return data_dict
+
+async def create_document(collection_name: str, data: Union[BaseModel, dict, List[Union[BaseModel, dict]]]):
+    """Insert a document with timestamp, or a list of them in one unordered bulk write"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    if isinstance(data, list):
+        docs = [_prepare(d) for d in data]
+        if not docs:
+            return []
+        # bulk_write doesn't report inserted ids, so assign them up front
+        for d in docs:
+            d.setdefault('_id', ObjectId())
+        await db[collection_name].bulk_write([InsertOne(d) for d in docs], ordered=False)
+        return [str(d['_id']) for d in docs]
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(_prepare(data))
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None):
+    """Get documents from collection, optionally projecting fields server-side"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
-    
-    cursor = db[collection_name].find(filter_dict or {})
+
+    cursor = db[collection_name].find(filter_dict or {}, projection=projection)
     if limit:
         cursor = cursor.limit(limit)
-    
-    return list(cursor)
+
+    return await cursor.to_list(length=limit)
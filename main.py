@@ -1,55 +1,180 @@
 import os
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+import time
+import hashlib
+import asyncio
+import logging
+from datetime import datetime
+from bisect import bisect_right
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from typing import List, Optional
-from pydantic import BaseModel
-from database import db, create_document, get_documents
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.decorator import cache
+import orjson
+import database
+from database import create_document, get_documents
 from bson import ObjectId
+from bson.errors import InvalidId
 
 # Pydantic models from schemas
 from schemas import (
     JerseyTemplate, Team, TeamRosterEntry, JerseyDesign,
-    PaymentIntent, JerseyOrder, PricingTier
+    PaymentIntent, JerseyOrder, PricingTier, SCHEMAS_REGISTRY_JSON
 )
 
-app = FastAPI(title="JerseyKraft API", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+# Compiled once; each validates a whole list in a single pydantic-core pass
+ROSTER_TA = TypeAdapter(List[TeamRosterEntry])
+TEMPLATES_TA = TypeAdapter(List[JerseyTemplate])
+
+# In-process pricing tiers sorted by min_quantity; tiers only change via create_tier.
+# Each worker refreshes its copy after TIER_CACHE_TTL so writes made through another
+# worker are picked up.
+TIER_CACHE_TTL = 60
+_TIER_CACHE: List[PricingTier] = []
+_TIER_KEYS: List[int] = []
+_TIER_LOCK = asyncio.Lock()
+_tiers_loaded_at: Optional[float] = None
+
+
+def _tiers_stale() -> bool:
+    return _tiers_loaded_at is None or time.monotonic() - _tiers_loaded_at > TIER_CACHE_TTL
+
+
+async def _load_tiers():
+    global _tiers_loaded_at
+    # The read happens under the lock so concurrent callers share one reload and
+    # a create_tier can't be overwritten by a snapshot taken before it
+    async with _TIER_LOCK:
+        if not _tiers_stale():
+            return
+        docs = await get_documents("pricingtier", projection={"_id": 0})
+        tiers = []
+        for d in docs:
+            # One bad stored tier must not take every checkout down with it
+            try:
+                tiers.append(PricingTier(**d))
+            except ValidationError as e:
+                logger.warning("Skipping invalid pricing tier %r: %s", d.get("name"), e)
+        tiers.sort(key=lambda t: t.min_quantity)
+        _TIER_CACHE[:] = tiers
+        _TIER_KEYS[:] = [t.min_quantity for t in tiers]
+        _tiers_loaded_at = time.monotonic()
+
+
+def _tier_for(quantity: int) -> Optional[PricingTier]:
+    idx = bisect_right(_TIER_KEYS, quantity) - 1
+    return _TIER_CACHE[idx] if idx >= 0 else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.connect()
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        # Shared across uvicorn workers so admin writes invalidate every process
+        from redis import asyncio as aioredis
+        from fastapi_cache.backends.redis import RedisBackend
+        FastAPICache.init(RedisBackend(aioredis.from_url(redis_url)), prefix="jerseykraft")
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix="jerseykraft")
+    try:
+        await database.ensure_indexes()
+        await _load_tiers()
+    except Exception:
+        # Don't block startup on an unreachable database; /test reports it and
+        # checkout retries loading the tiers
+        logger.exception("Database warm-up failed at startup")
+    yield
+    database.close()
+
+
+app = FastAPI(
+    title="JerseyKraft API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
+# Explicit origins (comma-separated FRONTEND_ORIGIN) and a day-long preflight cache
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[o.strip() for o in os.getenv("FRONTEND_ORIGIN", "https://jerseykraft.app").split(",") if o.strip()],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
 
+# fastapi-cache2 sends Cache-Control: max-age on cached routes, which would let
+# browsers keep serving a listing after an admin write clears the server cache.
+# no-cache makes them revalidate against the ETag it also sets.
+_REVALIDATE_PATHS = {"/api/templates", "/api/admin/tiers"}
+
+class RevalidateListingsMiddleware:
+    """Pure ASGI middleware; only the listed GET routes get a wrapped `send`"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in _REVALIDATE_PATHS:
+            return await self.app(scope, receive, send)
+
+        async def send_no_cache(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_no_cache)
+
+app.add_middleware(RevalidateListingsMiddleware)
+
+
+_ROOT_BYTES = orjson.dumps({"message": "JerseyKraft backend is running"})
+_ROOT_ETAG = '"%s"' % hashlib.sha1(_ROOT_BYTES).hexdigest()
+# no-cache: clients may keep the body but must revalidate, so a down backend
+# is never reported as running from a cache
+_ROOT_HEADERS = {"ETag": _ROOT_ETAG, "Cache-Control": "no-cache"}
+
 @app.get("/")
-def root():
-    return {"message": "JerseyKraft backend is running"}
+async def root(request: Request):
+    if _ROOT_ETAG in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=_ROOT_HEADERS)
+    return Response(_ROOT_BYTES, media_type="application/json", headers=_ROOT_HEADERS)
 
 
 @app.get("/schema")
-def schema_registry():
+async def schema_registry():
     # Expose schemas so the DB viewer can use them
-    from schemas import SCHEMAS_REGISTRY
-    return SCHEMAS_REGISTRY
+    return Response(SCHEMAS_REGISTRY_JSON, media_type="application/json")
 
 
 # Templates catalog
-@app.get("/api/templates", response_model=List[JerseyTemplate])
-def list_templates():
+# No response_model: TEMPLATES_TA already validates, so FastAPI needn't do it again
+@app.get("/api/templates")
+@cache(expire=60, namespace="templates")
+async def list_templates():
     try:
-        docs = get_documents("jerseytemplate")
-        # Convert Mongo docs to Pydantic models
-        return [JerseyTemplate(**{k: v for k, v in d.items() if k != "_id"}) for d in docs]
+        docs = await get_documents("jerseytemplate", projection={"_id": 0})
+        # Convert Mongo docs to Pydantic models in a single validation pass
+        return TEMPLATES_TA.validate_python(docs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/templates")
-def create_template(template: JerseyTemplate):
+async def create_template(template: JerseyTemplate):
     try:
-        _id = create_document("jerseytemplate", template)
+        _id = await create_document("jerseytemplate", template)
+        await FastAPICache.clear(namespace="templates")
         return {"id": _id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -57,36 +182,57 @@ def create_template(template: JerseyTemplate):
 
 # Team management
 @app.post("/api/team/import")
-def import_team(team_name: str = Form(...), sport: str = Form(...), csv: UploadFile = File(...)):
+async def import_team(team_name: str = Form(...), sport: str = Form(...), csv: UploadFile = File(...)):
     """
     Import roster from a CSV file with headers: name,number,size
     """
     import csv as pycsv
     import io
 
+    def parse_rows():
+        # Decode and parse row by row straight off the spooled upload
+        text = io.TextIOWrapper(csv.file, encoding="utf-8", newline="")
+        try:
+            rows = []
+            for row in pycsv.DictReader(text):
+                if not row:
+                    continue
+                rows.append({
+                    "name": row.get("name", "").strip(),
+                    "number": str(row.get("number", "")).strip(),
+                    "size": row.get("size", "M").strip().upper() or "M",
+                })
+            return rows
+        finally:
+            # Leave the underlying file for UploadFile to close
+            text.detach()
+
+    await csv.seek(0)
     try:
-        content = csv.file.read()
-    except Exception:
-        csv.file.seek(0)
-        content = csv.file.read()
+        # Uploads over 1MB are spooled to disk, so keep the blocking reads off the event loop
+        rows = await run_in_threadpool(parse_rows)
+        roster = ROSTER_TA.validate_python(rows)
+        team = Team(team_name=team_name, sport=sport)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
 
     try:
-        text = content.decode("utf-8")
-        reader = pycsv.DictReader(io.StringIO(text))
-        roster: List[TeamRosterEntry] = []
-        for row in reader:
-            if not row:
-                continue
-            roster.append(TeamRosterEntry(
-                name=row.get("name", "").strip(),
-                number=str(row.get("number", "")).strip(),
-                size=row.get("size", "M").strip().upper() or "M"
-            ))
-        team = Team(team_name=team_name, sport=sport, roster=roster)
-        _id = create_document("team", team)
-        return {"id": _id, "count": len(roster)}
+        _id = await create_document("team", team)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        # Players live in their own collection; one round-trip for the whole roster
+        await create_document("teamrosterentry", [{**e.model_dump(), "team_id": _id} for e in roster])
+    except Exception as e:
+        # Don't leave a header without players (or a partial unordered roster) behind
+        try:
+            await database.db["teamrosterentry"].delete_many({"team_id": _id})
+            await database.db["team"].delete_one({"_id": ObjectId(_id)})
+        except Exception:
+            logger.exception("Failed to roll back team %s after roster insert error", _id)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"id": _id, "count": len(roster)}
 
 
 # AI-powered logo creation (placeholder stub - would call an external model/service)
@@ -94,17 +240,19 @@ class AILogoRequest(BaseModel):
     prompt: str
     style: Optional[str] = "sporty"
 
+# For demo, a generated placeholder URL and suggested placement guidelines
+_AI_LOGO_BYTES = orjson.dumps({
+    "logo_url": "https://placehold.co/256x256/png?text=AI+Logo",
+    "suggested_positions": [
+        {"area": "front_center", "x": 0.5, "y": 0.25, "w": 0.3},
+        {"area": "chest_left", "x": 0.28, "y": 0.22, "w": 0.18},
+        {"area": "sleeve_right", "x": 0.82, "y": 0.35, "w": 0.2}
+    ]
+})
+
 @app.post("/api/ai/logo")
-def ai_logo(req: AILogoRequest):
-    # For demo, return a generated placeholder URL and suggested placement guidelines
-    return {
-        "logo_url": "https://placehold.co/256x256/png?text=AI+Logo",
-        "suggested_positions": [
-            {"area": "front_center", "x": 0.5, "y": 0.25, "w": 0.3},
-            {"area": "chest_left", "x": 0.28, "y": 0.22, "w": 0.18},
-            {"area": "sleeve_right", "x": 0.82, "y": 0.35, "w": 0.2}
-        ]
-    }
+async def ai_logo(req: AILogoRequest):
+    return Response(_AI_LOGO_BYTES, media_type="application/json")
 
 
 # Orders + payments
@@ -120,11 +268,13 @@ class CheckoutRequest(BaseModel):
     method: str  # upi | card | netbanking
 
 @app.post("/api/checkout")
-def checkout(req: CheckoutRequest):
+async def checkout(req: CheckoutRequest):
     try:
         # Simple pricing calculation using tiers (server-side guard)
-        tier_doc = db["pricingtier"].find_one({"min_quantity": {"$lte": req.quantity}}, sort=[("min_quantity", -1)])
-        base_price = float(tier_doc.get("base_price", 999.0)) if tier_doc else 999.0
+        if _tiers_stale():
+            await _load_tiers()
+        tier = _tier_for(req.quantity)
+        base_price = tier.base_price if tier else 999.0
         amount = round(base_price * req.quantity, 2)
 
         order = JerseyOrder(
@@ -136,72 +286,132 @@ def checkout(req: CheckoutRequest):
             template_id=req.template_id,
             design=req.design,
             quantity=req.quantity,
-            pricing_tier=tier_doc.get("name") if tier_doc else "Starter",
+            pricing_tier=tier.name if tier else "Starter",
             amount=amount,
         )
-        order_id = create_document("jerseyorder", order)
+        # Ids are generated client-side so the payment can reference the order
+        # and both inserts can run concurrently
+        order_oid, pay_oid = ObjectId(), ObjectId()
+        order_id = str(order_oid)
 
         # Simulate payment intent creation
         pay = PaymentIntent(order_id=order_id, amount=amount, method=req.method)
-        payment_id = create_document("paymentintent", pay)
+        _, payment_id = await asyncio.gather(
+            create_document("jerseyorder", {**order.model_dump(), "_id": order_oid}),
+            create_document("paymentintent", {**pay.model_dump(), "_id": pay_oid}),
+        )
 
         return {"order_id": order_id, "payment_id": payment_id, "amount": amount, "currency": "INR"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def valid_oid(order_id: str) -> ObjectId:
+    """Path dependency: parse the order id once, 400 if malformed"""
+    try:
+        return ObjectId(order_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid order id")
+
+
 class UpdateStatus(BaseModel):
     status: str  # Confirmed → In Production → QC → Shipped
 
 @app.post("/api/orders/{order_id}/status")
-def update_status(order_id: str, payload: UpdateStatus):
-    if not ObjectId.is_valid(order_id):
-        raise HTTPException(status_code=400, detail="Invalid order id")
+async def update_status(payload: UpdateStatus, order_id: ObjectId = Depends(valid_oid)):
     try:
-        db["jerseyorder"].update_one({"_id": ObjectId(order_id)}, {"$set": {"status": payload.status}})
+        await database.db["jerseyorder"].update_one({"_id": order_id}, {"$set": {"status": payload.status}})
         return {"ok": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Top-level fields selectable via ?fields= (timestamps are added by create_document)
+ORDER_FIELDS = set(JerseyOrder.model_fields) | {"created_at", "updated_at"}
+
 @app.get("/api/orders/{order_id}")
-def get_order(order_id: str):
-    if not ObjectId.is_valid(order_id):
-        raise HTTPException(status_code=400, detail="Invalid order id")
-    doc = db["jerseyorder"].find_one({"_id": ObjectId(order_id)})
+async def get_order(order_id: ObjectId = Depends(valid_oid), fields: Optional[str] = None):
+    # ?fields=status,amount returns just those fields (the id is always included)
+    projection = None
+    if fields:
+        names = {f.strip() for f in fields.split(",") if f.strip()} - {"id"}
+        unknown = names - ORDER_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        projection = {"_id": 1, **{f: 1 for f in names}}
+    doc = await database.db["jerseyorder"].find_one({"_id": order_id}, projection=projection)
     if not doc:
         raise HTTPException(status_code=404, detail="Not found")
     doc["id"] = str(doc.pop("_id"))
     return doc
 
 
+ORDER_LIST_FIELDS = {"customer_name": 1, "amount": 1, "status": 1, "quantity": 1, "payment_status": 1}
+
 @app.get("/api/orders")
-def list_orders(limit: int = 50):
-    docs = db["jerseyorder"].find().sort("_id", -1).limit(limit)
-    out = []
-    for d in docs:
-        d["id"] = str(d.pop("_id"))
-        out.append(d)
-    return out
+async def list_orders(limit: int = 50):
+    # Summary fields only; the full order (with design) is at /api/orders/{order_id}
+    cursor = database.db["jerseyorder"].find({}, projection=ORDER_LIST_FIELDS).sort("_id", -1).limit(limit)
+
+    # Stream the JSON array document by document instead of building a list
+    async def stream():
+        yield b"["
+        first = True
+        async for d in cursor:
+            d["id"] = str(d.pop("_id"))
+            yield orjson.dumps(d) if first else b"," + orjson.dumps(d)
+            first = False
+        yield b"]"
+
+    return StreamingResponse(stream(), media_type="application/json")
 
 
 # Admin basic endpoints
 @app.post("/api/admin/tiers")
-def create_tier(tier: PricingTier):
+async def create_tier(tier: PricingTier):
     try:
-        _id = create_document("pricingtier", tier)
+        # Insert under the tier lock so a concurrent reload sees either none or
+        # both of the DB write and the cache update
+        async with _TIER_LOCK:
+            _id = await create_document("pricingtier", tier)
+            idx = bisect_right(_TIER_KEYS, tier.min_quantity)
+            _TIER_KEYS.insert(idx, tier.min_quantity)
+            _TIER_CACHE.insert(idx, tier)
+        await FastAPICache.clear(namespace="tiers")
         return {"id": _id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/admin/tiers")
-def list_tiers():
-    return get_documents("pricingtier")
+@cache(expire=60, namespace="tiers")
+async def list_tiers():
+    docs = await get_documents("pricingtier", projection={"_id": 0})
+    # Stringify timestamps up front; fastapi-cache2's JsonCoder would otherwise
+    # round-trip them through pendulum and add an offset on cache hits
+    for d in docs:
+        for k in ("created_at", "updated_at"):
+            if isinstance(d.get(k), datetime):
+                d[k] = d[k].isoformat()
+    return docs
 
 
 # Utility/test endpoints
+# Collection names rarely change; cache them so frequent probes skip the round-trip
+COLLECTIONS_TTL = 60
+_collections_cache: Optional[tuple] = None  # (fetched_at, names)
+
+
+async def _collection_names() -> List[str]:
+    global _collections_cache
+    now = time.monotonic()
+    if _collections_cache is None or now - _collections_cache[0] > COLLECTIONS_TTL:
+        names = await database.db.list_collection_names()
+        _collections_cache = (now, names[:10])
+    return _collections_cache[1]
+
+
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -211,11 +421,10 @@ def test_database():
         "collections": []
     }
     try:
-        if db is not None:
+        if database.db is not None:
             response["database"] = "✅ Available"
             response["connection_status"] = "Connected"
-            collections = db.list_collection_names()
-            response["collections"] = collections[:10]
+            response["collections"] = await _collection_names()
         else:
             response["database"] = "⚠️ Available but not initialized"
     except Exception as e:
@@ -229,4 +438,5 @@ def test_database():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
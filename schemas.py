@@ -5,6 +5,11 @@ Each Pydantic model represents a collection in MongoDB. The collection name is t
 """
 from typing import List, Optional, Literal
 from pydantic import BaseModel, Field
+import orjson
+
+# Default colour lists; models take a fresh copy via the bound `.copy` factory
+DEFAULT_TEMPLATE_COLORS = ["#0A66C2", "#FF6F00"]
+DEFAULT_ACCENTS = ["#FF6F00"]  # saffron
 
 # Core domain models
 class PricingTier(BaseModel):
@@ -18,27 +23,28 @@ class JerseyTemplate(BaseModel):
         ..., description="Sport type"
     )
     name: str = Field(..., description="Template name")
-    colors: List[str] = Field(default_factory=lambda: ["#0A66C2", "#FF6F00"], description="Primary accent colors")
+    colors: List[str] = Field(default_factory=DEFAULT_TEMPLATE_COLORS.copy, description="Primary accent colors")
     preview_url: Optional[str] = Field(None, description="Preview image URL")
     svg: Optional[str] = Field(None, description="Optional SVG template markup")
     is_public: bool = Field(True, description="Visible in catalog")
 
 class TeamRosterEntry(BaseModel):
+    team_id: Optional[str] = Field(None, description="Owning team's id")
     name: str
     number: str
     size: Literal["XS", "S", "M", "L", "XL", "XXL"]
 
+# Players are stored in teamrosterentry, keyed by team_id
 class Team(BaseModel):
     team_name: str
     sport: str
-    roster: List[TeamRosterEntry] = Field(default_factory=list)
     logo_url: Optional[str] = None
     sponsor_logo_url: Optional[str] = None
 
 class JerseyDesign(BaseModel):
     front_color: str = Field("#0A66C2")
     back_color: str = Field("#0A66C2")
-    accents: List[str] = Field(default_factory=lambda: ["#FF6F00"])  # saffron
+    accents: List[str] = Field(default_factory=DEFAULT_ACCENTS.copy)
     text_elements: List[dict] = Field(default_factory=list, description="Draggable text layers")
     logo_elements: List[dict] = Field(default_factory=list, description="Draggable logo layers")
 
@@ -79,3 +85,6 @@ SCHEMAS_REGISTRY = {
     "jerseyorder": JerseyOrder.model_json_schema(),
     "adminuser": AdminUser.model_json_schema(),
 }
+
+# Serialized once at import; the registry never changes at runtime
+SCHEMAS_REGISTRY_JSON = orjson.dumps(SCHEMAS_REGISTRY)